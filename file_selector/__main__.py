@@ -10,177 +10,48 @@ All other functionality remains the same.
 
 import curses
 import os
+import time
 import pyperclip
-from typing import List, Tuple, Set
+from typing import Dict, Set, Tuple
 
+from file_selector.core import (
+    IGNORED_DIRS as IGNORED_DIRS,
+    build_file_tree,
+    build_snippet,
+    build_subtree_ends,
+    get_language_for_file,
+    get_visible_indices,
+    read_file_content as read_file_content,
+    toggle_selection,
+)
 
-def get_language_for_file(path: str) -> str:
-    """
-    Guess the programming language based on file extension.
-
-    Args:
-        path (str): The file path.
-
-    Returns:
-        str: The language name, or empty string if unknown.
-    """
-    ext = os.path.splitext(path)[1].lower()
-    match ext:
-        case ".c":
-            return "c"
-        case ".cpp" | ".cc" | ".cxx":
-            return "cpp"
-        case ".cs":
-            return "csharp"
-        case ".go":
-            return "go"
-        case ".java":
-            return "java"
-        case ".js" | ".jsx":
-            return "javascript"
-        case ".kt":
-            return "kotlin"
-        case ".m":
-            return "objective-c"
-        case ".php":
-            return "php"
-        case ".pl":
-            return "perl"
-        case ".py":
-            return "python"
-        case ".rs":
-            return "rust"
-        case ".ts" | ".tsx":
-            return "typescript"
-        case ".sol":
-            return "solidity"
-        case ".html" | ".htm":
-            return "html"
-        case ".css":
-            return "css"
-        case ".scss" | ".sass":
-            return "scss"
-        case ".json":
-            return "json"
-        case ".yaml" | ".yml":
-            return "yaml"
-        case ".toml":
-            return "toml"
-        case ".sh" | ".bash":
-            return "bash"
-        case ".md" | ".markdown":
-            return "markdown"
-        case ".sql":
-            return "sql"
-        case ".rb":
-            return "ruby"
-        case ".swift":
-            return "swift"
-        case _:
-            return ""
-
-
-def read_file_content(filepath: str) -> str:
-    """
-    Safely read the contents of a file as text.
 
-    Args:
-        filepath (str): The path to the file.
+# Delay before copying to the clipboard, so rapid toggles are copied once
+CLIPBOARD_DEBOUNCE_SECONDS = 0.05
 
-    Returns:
-        str: The file contents, or an empty string if reading fails.
-    """
-    try:
-        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
-    except Exception:
-        return ""
-
-
-IGNORED_DIRS = {
-    ".git",
-    "node_modules",
-    "__pycache__",
-    ".venv",
-    "venv",
-    "dist",
-    "build",
-    ".idea",
-    ".vscode",
-}
-
-
-def build_file_tree(root: str) -> List[Tuple[str, int, bool]]:
-    """
-    Recursively build a file tree from the given root directory.
+# How long to wait for the second key of a multi-key command such as gg
+KEY_SEQUENCE_TIMEOUT_MS = 300
 
-    Args:
-        root (str): The root directory path.
 
-    Returns:
-        List[Tuple[str, int, bool]]: A list of tuples (relative_path, depth, is_dir).
-    """
-    result = []
-
-    def recurse(path: str, depth: int):
-        entries = sorted(os.listdir(path))
-        for e in entries:
-            if e in IGNORED_DIRS:
-                continue
-            full_path = os.path.join(path, e)
-            rel_path = os.path.relpath(full_path, root)
-            is_dir = os.path.isdir(full_path)
-            result.append((rel_path, depth, is_dir))
-            if is_dir:
-                recurse(full_path, depth + 1)
-
-    recurse(root, 0)
-    return result
-
-
-def build_snippet(selected: Set[str], root: str) -> str:
-    """
-    Build a Markdown snippet combining selected files, with code blocks.
-
-    Args:
-        selected (Set[str]): A set of relative paths selected.
-        root (str): The root directory path.
-
-    Returns:
-        str: A formatted Markdown snippet of selected file contents.
-    """
-    snippet_parts = []
-    for p in sorted(selected):
-        full_path = os.path.join(root, p)
-        if os.path.isfile(full_path):
-            filename = os.path.basename(p)
-            directory_info = os.path.dirname(p)
-            if directory_info == ".":
-                directory_info = ""
-
-            lang = get_language_for_file(full_path)
-            content = read_file_content(full_path)
-
-            # Format the snippet with proper markdown code block
-            snippet_part = f"{directory_info + '/' if directory_info else ''}{filename}\n```{lang}\n{content}\n```"
-            snippet_parts.append(snippet_part.strip("\n"))
-
-    final_snippet = "\n\n".join(snippet_parts).strip()
-    return final_snippet
-
-
-def update_clipboard(selected: Set[str], root: str) -> str | None:
+def update_clipboard(
+    selected: Set[str],
+    root: str,
+    snippet_cache: Dict[str, Tuple[int, str]] | None = None,
+    file_langs: Dict[str, str] | None = None,
+) -> str | None:
     """
     Update the system clipboard with the current snippet of selected files.
 
     Args:
         selected (Set[str]): A set of selected paths.
         root (str): The root directory path.
+        snippet_cache (Dict[str, Tuple[int, str]] | None): Formatted blocks reused between updates.
+        file_langs (Dict[str, str] | None): Language of each relative path known to be a file.
 
     Returns:
         str | None: Error message if clipboard update failed, None on success.
     """
-    snippet = build_snippet(selected, root)
+    snippet = build_snippet(selected, root, snippet_cache, file_langs)
     try:
         pyperclip.copy(snippet)
         return None
@@ -188,65 +59,29 @@ def update_clipboard(selected: Set[str], root: str) -> str | None:
         return f"Clipboard error: {e}"
 
 
-def toggle_selection(selected: Set[str], tree: List[Tuple[str, int, bool]], index: int, root: str):
+def get_screen_layout(stdscr) -> Tuple[int, int, int, int]:
     """
-    Toggle the selection of a file or directory at a given index in the tree.
-    If a directory, toggle all of its descendants.
+    Compute the layout values that depend on the terminal size.
 
     Args:
-        selected (Set[str]): Current set of selected paths.
-        tree (List[Tuple[str, int, bool]]): The file tree.
-        index (int): Index in the tree list.
-        root (str): The root directory path.
-    """
-    rel_path, depth, is_dir = tree[index]
-
-    if is_dir:
-        # Determine all descendants
-        base_path = os.path.join(root, rel_path)
-        all_descendants = []
-        for p, d, idir in tree:
-            full_p = os.path.join(root, p)
-            if full_p == base_path or full_p.startswith(base_path + os.sep):
-                all_descendants.append(p)
-
-        # Check if directory is fully selected
-        all_descendants_set = set(all_descendants)
-        if all_descendants_set.issubset(selected):
-            # All already selected, deselect them
-            selected.difference_update(all_descendants_set)
-        else:
-            # Not all selected, select all that aren't selected
-            selected.update(all_descendants_set)
-    else:
-        # Just a file
-        if rel_path in selected:
-            selected.remove(rel_path)
-        else:
-            selected.add(rel_path)
-
+        stdscr: The curses standard screen object.
 
-def get_visible_indices(tree: List[Tuple[str, int, bool]], collapsed: Set[str]) -> List[int]:
+    Returns:
+        Tuple[int, int, int, int]: (width, max_lines, middle, row_width).
     """
-    Given the full tree and a set of collapsed directories, return the indices
-    of the items that should be visible.
+    h, w = stdscr.getmaxyx()
+    # We'll show the navigation bar at the top (line 0)
+    # File listing area below that
+    max_lines = h - 1  # one line for navigation at the top
 
-    We hide any item that is inside a collapsed directory (except the directory itself).
-    """
-    visible = []
-    for i, (p, depth, is_dir) in enumerate(tree):
-        # Check if this item is inside any collapsed directory
-        # A directory d is collapsed means all items under d are hidden,
-        # but d itself stays visible.
-        hidden = False
-        for c in collapsed:
-            # If p != c and p starts with c + os.sep, it's hidden
-            if p != c and p.startswith(c + os.sep):
-                hidden = True
-                break
-        if not hidden:
-            visible.append(i)
-    return visible
+    # Calculate the middle of the screen (for centering current file)
+    middle = max_lines // 2
+
+    # Rows are padded to a fixed width so each one is a single write that
+    # also overwrites whatever was there before. The last column is left
+    # alone so writing the bottom-right cell never fails.
+    row_width = max(w - 1, 0)
+    return w, max_lines, middle, row_width
 
 
 def main(stdscr):
@@ -262,9 +97,6 @@ def main(stdscr):
     # Create a subtle highlight color pair (grey on default background)
     curses.init_pair(1, 8, -1)  # 8 is grey in most terminal color schemes
 
-    # Set nodelay mode to prevent input blocking
-    stdscr.nodelay(1)
-
     # Enable keypad and remove cursor
     stdscr.keypad(1)
     curses.curs_set(0)
@@ -275,28 +107,74 @@ def main(stdscr):
 
     root = os.getcwd()
     tree = build_file_tree(root)
+    subtree_ends = build_subtree_ends(tree)
+
+    # Split the tree into parallel per-field columns so the render loop and
+    # key handlers index plain lists instead of unpacking tuples
+    paths = [p for p, _, _ in tree]
+    is_dirs = bytearray(is_dir for _, _, is_dir in tree)
+    # Language of every file, so snippet building neither parses extensions
+    # nor stats selected directories
+    file_langs = {p: get_language_for_file(p) for p, is_dir in zip(paths, is_dirs) if not is_dir}
+
+    # Per-node display strings never change, so build them once up front.
+    # Only the line number and selection mark vary between frames.
+    indents = ["  " * depth for _, depth, _ in tree]
+    labels = [f"{'[D]' if is_dir else '   '} {os.path.basename(p)}" for p, is_dir in zip(paths, is_dirs)]
 
     selected = set()
     collapsed = set()  # Keep track of directories that are collapsed
+    collapsed_version = 0  # Bumped whenever `collapsed` is mutated
 
     current_index = 0
     number_buffer = ""  # For handling number inputs for jumps and counts
     clipboard_error = None  # Error message from clipboard operations
+    snippet_cache = {}  # Formatted snippet block per selected file
+    clipboard_due = None  # Monotonic time of the next pending clipboard update
 
     # Force initial clipboard update
-    clipboard_error = update_clipboard(selected, root)
+    clipboard_error = update_clipboard(selected, root, snippet_cache, file_langs)
 
     # To force a full redraw after selection toggles or view changes
     last_start_line = -1
     last_current_index = -1
+    last_collapsed_version = -1
+
+    # Visible indices only change with `collapsed`, so cache them by version
+    visible_indices = []
+    visible_version = -1
+
+    # The terminal size only changes on KEY_RESIZE, so don't query it every frame
+    w, max_lines, middle, row_width = get_screen_layout(stdscr)
+
+    def draw_row(pos: int):
+        """Draw the entry at position `pos` of the visible list."""
+        vi = visible_indices[pos]
+        sel_mark = "[x]" if paths[vi] in selected else "[ ]"
+        # line_number shown is based on the visible line number, not the original tree index
+        line_str = f"{pos + 1:4d} {indents[vi]}{sel_mark} {labels[vi]}"
+        attr = curses.A_REVERSE if pos == current_index else 0
+        stdscr.addnstr(pos - start_line + 1, 0, line_str.ljust(row_width), row_width, attr)  # files start at line 1
 
     while True:
-        # Compute visible indices based on collapsed state
-        visible_indices = get_visible_indices(tree, collapsed)
-        if not visible_indices:
-            # If nothing is visible (extreme edge case?), reset collapse and show all
-            collapsed.clear()
+        # Flush a pending clipboard update once toggles have settled
+        if clipboard_due is not None and time.monotonic() >= clipboard_due:
+            clipboard_due = None
+            error = update_clipboard(selected, root, snippet_cache, file_langs)
+            if error != clipboard_error:
+                clipboard_error = error
+                # Force redraw of the navigation bar
+                last_start_line = -1
+
+        # Recompute visible indices only when the collapsed state changed
+        if visible_version != collapsed_version:
             visible_indices = get_visible_indices(tree, collapsed)
+            if not visible_indices and collapsed:
+                # If nothing is visible (extreme edge case?), reset collapse and show all
+                collapsed.clear()
+                collapsed_version += 1
+                visible_indices = get_visible_indices(tree, collapsed)
+            visible_version = collapsed_version
 
         # Ensure current_index is within range
         if current_index >= len(visible_indices):
@@ -304,67 +182,54 @@ def main(stdscr):
         if current_index < 0:
             current_index = 0
 
-        h, w = stdscr.getmaxyx()
-        # We'll show the navigation bar at the top (line 0)
-        # File listing area below that
-        max_lines = h - 1  # one line for navigation at the top
-
-        # Calculate the middle of the screen (for centering current file)
-        middle = max_lines // 2
-
         start_line = max(0, current_index - middle)
         if start_line + max_lines > len(visible_indices):
             start_line = max(0, len(visible_indices) - max_lines)
 
-        # Draw navigation bar at the top (line 0)
-        stdscr.move(0, 0)
-        stdscr.clrtoeol()
-        if clipboard_error:
-            stdscr.attron(curses.A_BOLD)
-            stdscr.addstr(0, 0, clipboard_error[:w])
-            stdscr.attroff(curses.A_BOLD)
-        else:
-            stdscr.attron(curses.color_pair(1))
-            nav_line = "Navigation: ↑/↓/j/k [count] for movement | [count]G/go to line | gg top | q quit | Enter toggle | Shift+> hide | Shift+< unhide"
-            stdscr.addstr(0, 0, nav_line[:w])
-            stdscr.attroff(curses.color_pair(1))
-        stdscr.noutrefresh()
-
-        # Only redraw lines if something changed
-        if start_line != last_start_line or current_index != last_current_index:
+        # Only redraw (and flush to the terminal) if something changed
+        if start_line != last_start_line or collapsed_version != last_collapsed_version:
+            # Draw navigation bar at the top (line 0)
+            stdscr.move(0, 0)
+            stdscr.clrtoeol()
+            if clipboard_error:
+                stdscr.attron(curses.A_BOLD)
+                stdscr.addstr(0, 0, clipboard_error[:w])
+                stdscr.attroff(curses.A_BOLD)
+            else:
+                stdscr.attron(curses.color_pair(1))
+                nav_line = "Navigation: ↑/↓/j/k [count] for movement | [count]G/go to line | gg top | q quit | Enter toggle | Shift+> hide | Shift+< unhide"
+                stdscr.addstr(0, 0, nav_line[:w])
+                stdscr.attroff(curses.color_pair(1))
+
             # Draw each visible line
-            for i, vi in enumerate(visible_indices[start_line : start_line + max_lines]):
-                p, depth, is_dir = tree[vi]
-                filename = os.path.basename(p)
-                indent = "  " * depth
-                marker = "[D]" if is_dir else "   "
-                sel_mark = "[x]" if p in selected else "[ ]"
-                # line_number shown is based on the visible line number, not the original tree index
-                line_number = i + start_line + 1
-                line_str = f"{line_number:4d} {indent}{sel_mark} {marker} {filename}"
-
-                stdscr.move(i + 1, 0)  # files start at line 1
-                stdscr.clrtoeol()
-                if (i + start_line) == current_index:
-                    stdscr.attron(curses.A_REVERSE)
-                    stdscr.addstr(i + 1, 0, line_str[:w])
-                    stdscr.attroff(curses.A_REVERSE)
-                else:
-                    stdscr.addstr(i + 1, 0, line_str[:w])
-                stdscr.noutrefresh()
-
-            # Clear any extra lines if list got shorter
-            shown_count = len(visible_indices[start_line : start_line + max_lines])
-            for clr_i in range(shown_count + 1, max_lines + 1):
-                stdscr.move(clr_i + 1, 0)
-                stdscr.clrtoeol()
-                stdscr.noutrefresh()
-
-            last_start_line = start_line
-            last_current_index = current_index
-
-        curses.doupdate()
-        curses.napms(10)
+            shown_count = min(max_lines, len(visible_indices) - start_line)
+            for pos in range(start_line, start_line + shown_count):
+                draw_row(pos)
+
+            # Blank out any extra lines if list got shorter
+            blank = " " * row_width
+            for clr_i in range(shown_count, max_lines):
+                stdscr.addnstr(clr_i + 1, 0, blank, row_width)
+            stdscr.noutrefresh()
+            curses.doupdate()
+        elif current_index != last_current_index:
+            # Only the cursor moved within the same window: repaint just the
+            # previously and newly highlighted rows
+            draw_row(last_current_index)
+            draw_row(current_index)
+            stdscr.noutrefresh()
+            curses.doupdate()
+
+        last_start_line = start_line
+        last_current_index = current_index
+        last_collapsed_version = collapsed_version
+
+        # Block until a key arrives. Only wake up early if a clipboard update
+        # is waiting on the debounce, so an idle UI uses no CPU at all.
+        if clipboard_due is None:
+            stdscr.timeout(-1)
+        else:
+            stdscr.timeout(max(0, int((clipboard_due - time.monotonic()) * 1000) + 1))
 
         key = stdscr.getch()
         if key in [curses.KEY_UP, ord("k")]:
@@ -382,14 +247,17 @@ def main(stdscr):
                 current_index = min(max(0, target), len(visible_indices) - 1)
                 number_buffer = ""
             else:
-                # Temporarily disable nodelay to wait for the next char
-                curses.napms(50)
-                stdscr.nodelay(0)
+                # Wait briefly for the next char of the sequence
+                stdscr.timeout(KEY_SEQUENCE_TIMEOUT_MS)
                 next_key = stdscr.getch()
-                stdscr.nodelay(1)
                 if next_key == ord("g"):
                     # gg pressed - go to top visible line
                     current_index = 0
+                elif next_key == curses.KEY_RESIZE:
+                    # Don't lose a resize that arrived mid-sequence
+                    w, max_lines, middle, row_width = get_screen_layout(stdscr)
+                    # Force redraw
+                    last_start_line = -1
                 elif next_key != -1 and next_key != ord("g"):
                     # If another key was pressed, interpret it as a normal key
                     if ord("0") <= next_key <= ord("9"):
@@ -404,33 +272,38 @@ def main(stdscr):
             number_buffer = ""
         elif ord("0") <= key <= ord("9"):
             number_buffer += chr(key)
+        elif key == curses.KEY_RESIZE:
+            w, max_lines, middle, row_width = get_screen_layout(stdscr)
+            # Force redraw
+            last_start_line = -1
         elif key == ord("q"):
+            # Don't drop a toggle that is still waiting on the debounce
+            if clipboard_due is not None:
+                update_clipboard(selected, root, snippet_cache, file_langs)
             break
         elif key == 10:  # ENTER
             if visible_indices:
-                toggle_selection(selected, tree, visible_indices[current_index], root)
-                clipboard_error = update_clipboard(selected, root)
+                toggle_selection(selected, tree, visible_indices[current_index], subtree_ends)
+                clipboard_due = time.monotonic() + CLIPBOARD_DEBOUNCE_SECONDS
                 # Force redraw
                 last_start_line = -1
                 last_current_index = -1
         elif key == ord(">"):  # Shift+>
             # Collapse the currently highlighted directory if it's a directory
             if visible_indices:
-                rel_path, depth, is_dir = tree[visible_indices[current_index]]
-                if is_dir and rel_path not in collapsed:
+                vi = visible_indices[current_index]
+                rel_path = paths[vi]
+                if is_dirs[vi] and rel_path not in collapsed:
                     collapsed.add(rel_path)
-                    # Force redraw
-                    last_start_line = -1
-                    last_current_index = -1
+                    collapsed_version += 1
         elif key == ord("<"):  # Shift+<
             # Uncollapse the currently highlighted directory if it's collapsed
             if visible_indices:
-                rel_path, depth, is_dir = tree[visible_indices[current_index]]
-                if is_dir and rel_path in collapsed:
+                vi = visible_indices[current_index]
+                rel_path = paths[vi]
+                if is_dirs[vi] and rel_path in collapsed:
                     collapsed.remove(rel_path)
-                    # Force redraw
-                    last_start_line = -1
-                    last_current_index = -1
+                    collapsed_version += 1
 
     # End curses mode on exit
     curses.nocbreak()
@@ -0,0 +1,314 @@
+"""
+Core helpers for file-selector: building the file tree, tracking selection and
+visibility, and formatting selected files as a Markdown snippet.
+
+Nothing here touches curses or the clipboard, so it can be imported and tested
+without a terminal.
+"""
+
+import operator
+import os
+import stat
+from typing import Dict, List, Tuple, Set
+
+
+# Code block language for each (lowercase) file extension, without the dot
+_LANG_BY_EXT = {
+    "c": "c",
+    "cpp": "cpp",
+    "cc": "cpp",
+    "cxx": "cpp",
+    "cs": "csharp",
+    "go": "go",
+    "java": "java",
+    "js": "javascript",
+    "jsx": "javascript",
+    "kt": "kotlin",
+    "m": "objective-c",
+    "php": "php",
+    "pl": "perl",
+    "py": "python",
+    "rs": "rust",
+    "ts": "typescript",
+    "tsx": "typescript",
+    "sol": "solidity",
+    "html": "html",
+    "htm": "html",
+    "css": "css",
+    "scss": "scss",
+    "sass": "scss",
+    "json": "json",
+    "yaml": "yaml",
+    "yml": "yaml",
+    "toml": "toml",
+    "sh": "bash",
+    "bash": "bash",
+    "md": "markdown",
+    "markdown": "markdown",
+    "sql": "sql",
+    "rb": "ruby",
+    "swift": "swift",
+}
+
+
+def get_language_for_file(path: str) -> str:
+    """
+    Guess the programming language based on file extension.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        str: The language name, or empty string if unknown.
+    """
+    i = path.rfind(".")
+    name_start = path.rfind(os.sep) + 1
+    # Like os.path.splitext: no extension if there is no dot in the file name,
+    # or only leading dots before it (".bashrc", "..py")
+    if i < name_start or path.count(".", name_start, i) == i - name_start:
+        return ""
+    ext = path[i + 1 :]
+    # Most extensions are already lowercase, so skip the lower() copy for them
+    if not ext.islower():
+        ext = ext.lower()
+    return _LANG_BY_EXT.get(ext, "")
+
+
+def read_file_content(filepath: str) -> str:
+    """
+    Safely read the contents of a file as text.
+
+    Args:
+        filepath (str): The path to the file.
+
+    Returns:
+        str: The file contents, or an empty string if reading fails.
+    """
+    try:
+        # Decoding the raw bytes in one go is leaner than a TextIOWrapper
+        with open(filepath, "rb") as f:
+            text = f.read().decode("utf-8", errors="replace")
+    except Exception:
+        return ""
+    # Match text mode's universal newline handling
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+# Directory names that are never listed or descended into
+IGNORED_DIRS: frozenset[str] = frozenset({
+    ".git",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "dist",
+    "build",
+    ".idea",
+    ".vscode",
+})
+
+
+def build_file_tree(root: str) -> List[Tuple[str, int, bool]]:
+    """
+    Build a file tree from the given root directory, in depth-first order with
+    entries sorted by name and each directory followed by its descendants.
+
+    Args:
+        root (str): The root directory path.
+
+    Returns:
+        List[Tuple[str, int, bool]]: A list of tuples (relative_path, depth, is_dir).
+    """
+    result = []
+    # Every entry path starts with root plus a separator, so slicing it off
+    # is enough to get the relative path
+    root_prefix_len = len(os.path.join(root, ""))
+
+    # Bind hot lookups once rather than resolving globals/attributes per entry
+    scandir = os.scandir
+    by_name = operator.attrgetter("name")
+    ignored = IGNORED_DIRS
+    append = result.append
+
+    def sorted_entries(path: str):
+        # scandir reports the entry type from the directory listing itself,
+        # so telling files from directories needs no extra stat per entry
+        with scandir(path) as it:
+            return iter(sorted(it, key=by_name))
+
+    # Walk with an explicit stack of partially consumed directory listings
+    # instead of recursing, so deep trees can't hit the recursion limit.
+    # The depth of an entry is the number of open listings above it.
+    stack = [sorted_entries(root)]
+    while stack:
+        depth = len(stack) - 1
+        for e in stack[-1]:
+            if e.name in ignored:
+                continue
+            full_path = e.path
+            is_dir = e.is_dir(follow_symlinks=False)
+            append((full_path[root_prefix_len:], depth, is_dir))
+            if is_dir:
+                # Descend now; the rest of this listing resumes afterwards
+                stack.append(sorted_entries(full_path))
+                break
+        else:
+            stack.pop()
+    return result
+
+
+def format_snippet_block(rel_path: str, root: str, lang: str | None = None) -> str:
+    """
+    Format a single file as a Markdown code block headed by its relative path.
+
+    Args:
+        rel_path (str): The file path relative to root.
+        root (str): The root directory path.
+        lang (str | None): The code block language, detected from the extension if None.
+
+    Returns:
+        str: The formatted code block.
+    """
+    full_path = os.path.join(root, rel_path)
+    filename = os.path.basename(rel_path)
+    directory_info = os.path.dirname(rel_path)
+    if directory_info == ".":
+        directory_info = ""
+
+    if lang is None:
+        lang = get_language_for_file(full_path)
+    content = read_file_content(full_path)
+
+    # Format the snippet with proper markdown code block
+    snippet_part = f"{directory_info + '/' if directory_info else ''}{filename}\n```{lang}\n{content}\n```"
+    return snippet_part.strip("\n")
+
+
+def build_snippet(
+    selected: Set[str],
+    root: str,
+    cache: Dict[str, Tuple[int, str]] | None = None,
+    file_langs: Dict[str, str] | None = None,
+) -> str:
+    """
+    Build a Markdown snippet combining selected files, with code blocks.
+
+    Args:
+        selected (Set[str]): A set of relative paths selected.
+        root (str): The root directory path.
+        cache (Dict[str, Tuple[int, str]] | None): Optional map of relative path to
+            (mtime_ns, formatted block), reused across calls so only newly selected
+            or modified files are read. Entries for paths no longer selected are dropped.
+        file_langs (Dict[str, str] | None): Optional map of every relative path known
+            to be a file (e.g. from build_file_tree) to its language. Other selected
+            paths (directories) are skipped without touching the disk.
+
+    Returns:
+        str: A formatted Markdown snippet of selected file contents.
+    """
+    if cache is None:
+        cache = {}
+    else:
+        for p in cache.keys() - selected:
+            del cache[p]
+
+    snippet_parts = []
+    for p in sorted(selected):
+        lang = None
+        if file_langs is not None:
+            lang = file_langs.get(p)
+            if lang is None:
+                continue
+        try:
+            st = os.stat(os.path.join(root, p))
+        except OSError:
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        cached = cache.get(p)
+        if cached is None or cached[0] != st.st_mtime_ns:
+            cached = cache[p] = (st.st_mtime_ns, format_snippet_block(p, root, lang))
+        snippet_parts.append(cached[1])
+
+    final_snippet = "\n\n".join(snippet_parts).strip()
+    return final_snippet
+
+
+def build_subtree_ends(tree: List[Tuple[str, int, bool]]) -> List[int]:
+    """
+    Compute where each node's subtree ends in the tree list.
+
+    Since build_file_tree emits descendants contiguously after their directory,
+    the subtree rooted at index i is exactly tree[i:ends[i]].
+
+    Args:
+        tree (List[Tuple[str, int, bool]]): The file tree.
+
+    Returns:
+        List[int]: The exclusive end index of each node's subtree.
+    """
+    n = len(tree)
+    ends = [n] * n
+    stack = []  # Indices of the ancestors of the current node
+    for i, (_, depth, _) in enumerate(tree):
+        while stack and tree[stack[-1]][1] >= depth:
+            ends[stack.pop()] = i
+        stack.append(i)
+    return ends
+
+
+def toggle_selection(selected: Set[str], tree: List[Tuple[str, int, bool]], index: int, subtree_ends: List[int]):
+    """
+    Toggle the selection of a file or directory at a given index in the tree.
+    If a directory, toggle all of its descendants.
+
+    Args:
+        selected (Set[str]): Current set of selected paths.
+        tree (List[Tuple[str, int, bool]]): The file tree.
+        index (int): Index in the tree list.
+        subtree_ends (List[int]): Subtree end indices from build_subtree_ends.
+    """
+    rel_path, depth, is_dir = tree[index]
+
+    if is_dir:
+        # The directory and all its descendants
+        all_descendants_set = {tree[k][0] for k in range(index, subtree_ends[index])}
+
+        # Check if directory is fully selected
+        if all_descendants_set.issubset(selected):
+            # All already selected, deselect them
+            selected.difference_update(all_descendants_set)
+        else:
+            # Not all selected, select all that aren't selected
+            selected.update(all_descendants_set)
+    else:
+        # Just a file
+        if rel_path in selected:
+            selected.remove(rel_path)
+        else:
+            selected.add(rel_path)
+
+
+def get_visible_indices(tree: List[Tuple[str, int, bool]], collapsed: Set[str]) -> List[int]:
+    """
+    Given the full tree and a set of collapsed directories, return the indices
+    of the items that should be visible.
+
+    We hide any item that is inside a collapsed directory (except the directory itself).
+    Since build_file_tree emits descendants contiguously after their directory,
+    a collapsed directory's subtree is skipped in a single linear pass.
+    """
+    visible = []
+    n = len(tree)
+    i = 0
+    while i < n:
+        p, depth, is_dir = tree[i]
+        visible.append(i)
+        i += 1
+        if is_dir and p in collapsed:
+            # Skip everything nested deeper than the collapsed directory
+            while i < n and tree[i][1] > depth:
+                i += 1
+    return visible
@@ -4,6 +4,7 @@ import os
 import tempfile
 
 from file_selector.__main__ import get_language_for_file, build_file_tree, IGNORED_DIRS
+from file_selector.core import build_snippet, build_subtree_ends, get_visible_indices, read_file_content, toggle_selection
 
 
 class TestGetLanguageForFile:
@@ -21,6 +22,14 @@ class TestGetLanguageForFile:
         assert get_language_for_file("file.xyz") == ""
         assert get_language_for_file("no_extension") == ""
 
+    def test_dotfiles_have_no_extension(self):
+        assert get_language_for_file(".py") == ""
+        assert get_language_for_file(os.path.join("src", ".py")) == ""
+        assert get_language_for_file("..py") == ""
+        assert get_language_for_file("...md") == ""
+        assert get_language_for_file(os.path.join("src", "..py")) == ""
+        assert get_language_for_file("..a.py") == "python"
+
     def test_case_insensitive(self):
         assert get_language_for_file("FILE.PY") == "python"
         assert get_language_for_file("App.JSX") == "javascript"
@@ -46,3 +55,107 @@ class TestBuildFileTree:
             assert "src" in paths
             for ignored in [".git", "node_modules", "__pycache__"]:
                 assert ignored not in paths
+
+    def test_depth_first_sorted_order(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, "a", "b"))
+            for name in [os.path.join("a", "b", "c.py"), os.path.join("a", "d.py"), "a-e.py"]:
+                open(os.path.join(tmpdir, name), "w").close()
+
+            assert build_file_tree(tmpdir) == [
+                ("a", 0, True),
+                (os.path.join("a", "b"), 1, True),
+                (os.path.join("a", "b", "c.py"), 2, False),
+                (os.path.join("a", "d.py"), 1, False),
+                ("a-e.py", 0, False),
+            ]
+
+    def test_ignored_dirs_is_immutable(self):
+        assert isinstance(IGNORED_DIRS, frozenset)
+        assert ".git" in IGNORED_DIRS
+
+
+class TestGetVisibleIndices:
+    """Test hiding the contents of collapsed directories."""
+
+    TREE = [
+        ("a", 0, True),
+        (os.path.join("a", "b"), 1, True),
+        (os.path.join("a", "b", "c.py"), 2, False),
+        (os.path.join("a", "d.py"), 1, False),
+        ("e.py", 0, False),
+    ]
+
+    def test_nothing_collapsed(self):
+        assert get_visible_indices(self.TREE, set()) == [0, 1, 2, 3, 4]
+
+    def test_collapsed_directory_stays_visible(self):
+        assert get_visible_indices(self.TREE, {"a"}) == [0, 4]
+        assert get_visible_indices(self.TREE, {os.path.join("a", "b")}) == [0, 1, 3, 4]
+
+
+class TestToggleSelection:
+    """Test toggling files and whole directories."""
+
+    TREE = TestGetVisibleIndices.TREE
+
+    def test_subtree_ends(self):
+        assert build_subtree_ends(self.TREE) == [4, 3, 3, 4, 5]
+
+    def test_toggle_directory_selects_descendants(self):
+        ends = build_subtree_ends(self.TREE)
+        selected = set()
+        toggle_selection(selected, self.TREE, 1, ends)
+        assert selected == {os.path.join("a", "b"), os.path.join("a", "b", "c.py")}
+        toggle_selection(selected, self.TREE, 0, ends)
+        assert selected == {p for p, _, _ in self.TREE[:4]}
+        toggle_selection(selected, self.TREE, 0, ends)
+        assert selected == set()
+
+
+class TestBuildSnippet:
+    """Test snippet formatting and the per-file block cache."""
+
+    def test_cache_reuses_and_prunes_blocks(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, "src"))
+            with open(os.path.join(tmpdir, "src", "app.py"), "w") as f:
+                f.write("print(1)")
+            with open(os.path.join(tmpdir, "notes.txt"), "w") as f:
+                f.write("hi")
+
+            app_path = os.path.join("src", "app.py")
+            cache = {}
+            snippet = build_snippet({"src", app_path, "notes.txt"}, tmpdir, cache)
+            assert snippet == f"notes.txt\n```\nhi\n```\n\n{app_path}\n```python\nprint(1)\n```"
+            assert set(cache) == {app_path, "notes.txt"}
+
+            mtime, _ = cache["notes.txt"]
+            cache["notes.txt"] = (mtime, "cached")
+            assert build_snippet({"notes.txt"}, tmpdir, cache) == "cached"
+            assert set(cache) == {"notes.txt"}
+
+            # A modified file is read again
+            os.utime(os.path.join(tmpdir, "notes.txt"), ns=(mtime + 10**9, mtime + 10**9))
+            assert build_snippet({"notes.txt"}, tmpdir, cache) == "notes.txt\n```\nhi\n```"
+
+    def test_file_langs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "a.py"), "w") as f:
+                f.write("x = 1")
+            assert build_snippet({"a.py"}, tmpdir, file_langs={"a.py": "py3"}) == "a.py\n```py3\nx = 1\n```"
+            assert build_snippet({"a.py"}, tmpdir, file_langs={}) == ""
+
+
+class TestReadFileContent:
+    """Test that reading matches text mode with errors="replace"."""
+
+    def test_newlines_and_invalid_utf8(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "mixed.txt")
+            with open(path, "wb") as f:
+                f.write(b"a\r\nb\rc\xff\nd\r\r\n\xe2\x82")
+            with open(path, encoding="utf-8", errors="replace") as f:
+                expected = f.read()
+            assert read_file_content(path) == expected
+            assert read_file_content(path) == "a\nb\nc�\nd\n\n�"